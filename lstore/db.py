@@ -1,14 +1,47 @@
-from lstore.table import Table
+from lstore.table import Table, VersionChain
 from lstore.page import Page
 from lstore.lock import get_lock_manager
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import mmap
 import os
 import struct
+import sys
 import threading
 
+_I = struct.Struct('<i')
+_II = struct.Struct('<ii')
+_PAGE = struct.Struct('<i4096s')
+_RID_HEADER = struct.Struct('<qi')
+_TABLE_META = struct.Struct('<64sii')
+
+MAX_TABLE_NAME_BYTES = 64
+
+# Version chain arrays are written as raw bytes, so on a big-endian machine they are swapped to
+# match the little-endian '<' structs used for every other field
+_SWAP_BYTES = sys.byteorder != 'little'
+
+# version_chains.dat files starting with this marker store each record's VersionChain arrays verbatim;
+# older files start directly with the record count.
+VC_COLUMNAR = -1
+
+# metadata.db files starting with this marker hold one fixed-width _TABLE_META record per table;
+# older files store length-prefixed names.
+META_FIXED_WIDTH = -1
+
+MAX_IO_WORKERS = 16
+
+def _check_table_name(name):
+    """Raise ValueError if name does not fit in a _TABLE_META record, which would silently truncate it."""
+    if len(name.encode('utf-8')) > MAX_TABLE_NAME_BYTES:
+        raise ValueError(f"table name must be at most {MAX_TABLE_NAME_BYTES} bytes: {name!r}")
+
 class Database():
 
     def __init__(self):
         self.tables = []
+        self._tables_by_name = {}
         self.path = None
         self.lock_manager = get_lock_manager()
         self.db_lock = threading.RLock()
@@ -28,18 +61,51 @@ class Database():
                 return
             
             with open(metadata_path, 'rb') as f:
-                num_tables = struct.unpack('i', f.read(4))[0]
-                
-                for i in range(num_tables):
-                    name_len = struct.unpack('i', f.read(4))[0]
-                    name = f.read(name_len).decode('utf-8')
-                    num_columns = struct.unpack('i', f.read(4))[0]
-                    key_index = struct.unpack('i', f.read(4))[0]
-                    
-                    table = Table(name, num_columns, key_index)
-                    self.tables.append(table)
-                    
-                    self.load_table_data(path, table)
+                buf = f.read()
+            
+            if _I.unpack_from(buf, 0)[0] == META_FIXED_WIDTH:
+                num_tables = _I.unpack_from(buf, _I.size)[0]
+                records = memoryview(buf)[2 * _I.size:2 * _I.size + num_tables * _TABLE_META.size]
+                tables = [Table(name.rstrip(b'\0').decode('utf-8'), num_columns, key_index)
+                          for name, num_columns, key_index in _TABLE_META.iter_unpack(records)]
+            else:
+                tables = self.read_legacy_metadata(buf)
+            
+            if tables:
+                with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, len(tables))) as executor:
+                    futures = [executor.submit(self.load_table_data, path, table) for table in tables]
+                    for future in futures:
+                        future.result()
+            
+            self.tables.extend(tables)
+            self._publish_tables()
+
+    def read_legacy_metadata(self, buf):
+        """Decode table definitions from metadata written with length-prefixed names"""
+        num_tables = _I.unpack_from(buf, 0)[0]
+        offset = _I.size
+        tables = []
+        
+        for i in range(num_tables):
+            name_len = _I.unpack_from(buf, offset)[0]
+            offset += _I.size
+            name = buf[offset:offset + name_len].decode('utf-8')
+            offset += name_len
+            num_columns, key_index = _II.unpack_from(buf, offset)
+            offset += _II.size
+            tables.append(Table(name, num_columns, key_index))
+        
+        return tables
+
+    def _publish_tables(self):
+        """
+        Rebuild the name -> table map read by get_table. Must be called with db_lock held.
+        A new dict is swapped in rather than mutated so readers never need the lock.
+        """
+        tables_by_name = {}
+        for table in self.tables:
+            tables_by_name.setdefault(table.name, table)
+        self._tables_by_name = tables_by_name
 
     def load_table_data(self, path, table):
         """Load all data for a specific table"""        
@@ -48,16 +114,19 @@ class Database():
         if not os.path.exists(table_path):
             return
         
-        for idx in range(table.num_columns):
-            base_dir = os.path.join(table_path, f'base_col_{idx}')
-            table.base_page[idx] = self.load_pages(base_dir)
-        
-        for idx in range(table.num_columns):
-            tail_dir = os.path.join(table_path, f'tail_col_{idx}')
-            table.tail_page[idx] = self.load_pages(tail_dir)
+        with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, 2 * table.num_columns)) as executor:
+            base_futures = [executor.submit(self.load_pages, os.path.join(table_path, f'base_col_{idx}'))
+                            for idx in range(table.num_columns)]
+            tail_futures = [executor.submit(self.load_pages, os.path.join(table_path, f'tail_col_{idx}'))
+                            for idx in range(table.num_columns)]
+            
+            for idx in range(table.num_columns):
+                table.base_page[idx] = base_futures[idx].result()
+                table.tail_page[idx] = tail_futures[idx].result()
         
         self.load_page_directory(table_path, table)
         self.load_version_chains(table_path, table)
+        table.dirty = False
         
         table.index.drop_index(table.key)
         table.index.create_index(table.key)
@@ -68,21 +137,52 @@ class Database():
         dot = underscore.split('.')[0]
         return int(dot)
 
-    def load_pages(self, directory):
-        """Load all pages from a directory"""
-        if not os.path.exists(directory):
+    def load_pages(self, column_path):
+        """Load all pages of a column from its page file"""
+        file_path = column_path + '.dat'
+        
+        if not os.path.exists(file_path):
+            return self.load_legacy_pages(column_path)
+        
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return [Page()]
+            if os.name == 'nt':
+                # Windows cannot replace a file that still has a mapped view, which save_pages does on
+                # close, so read the column into memory instead
+                mm = bytearray(size)
+                f.readinto(mm)
+            else:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        
+        # Pages are zero-copy views into a private mapping (or, on Windows, an in-memory copy): the OS page
+        # cache holds the bytes until a page is first written, and writes never reach the file behind our back.
+        view = memoryview(mm)
+        pages = []
+        for offset in range(0, len(mm), _PAGE.size):
+            page = Page(view[offset + _I.size:offset + _PAGE.size])
+            page.num_records = _I.unpack_from(mm, offset)[0]
+            page.dirty = False
+            pages.append(page)
+
+        return pages if pages else [Page()]
+
+    def load_legacy_pages(self, directory):
+        """Load pages stored one file per page (page_<n>.dat), as written by older versions"""
+        if not os.path.isdir(directory):
             return [Page()]
         
-        all_files = os.listdir(directory)
-        dat_files = [f for f in all_files if f.endswith('.dat')]
-        page_files = sorted(dat_files, key=self.get_page_number)
+        with os.scandir(directory) as entries:
+            dat_files = [e for e in entries if e.name.endswith('.dat')]
+        page_files = sorted(dat_files, key=lambda e: self.get_page_number(e.name))
         
         pages = []
         for page_file in page_files:
-            page = Page()
-            with open(os.path.join(directory, page_file), 'rb') as f:
-                page.num_records = struct.unpack('i', f.read(4))[0]
-                page.data = bytearray(f.read(4096))
+            with open(page_file.path, 'rb') as f:
+                num_records = _I.unpack(f.read(_I.size))[0]
+                page = Page(bytearray(f.read(4096)))
+                page.num_records = num_records
             pages.append(page)
 
         return pages if pages else [Page()]
@@ -95,21 +195,17 @@ class Database():
             return
         
         with open(pd_path, 'rb') as f:
-            num_entries = struct.unpack('i', f.read(4))[0]
-            
-            for i in range(num_entries):
-                rid = struct.unpack('q', f.read(8))[0]
-                positions = []
-                
-                for col_idx in range(table.num_columns):
-                    page_idx = struct.unpack('i', f.read(4))[0]
-                    slot_idx = struct.unpack('i', f.read(4))[0]
-                    positions.append((page_idx, slot_idx))
-                
-                table.page_directory[rid] = positions
-            
-            if table.page_directory:
-                table.rid_counter = max(table.page_directory.keys())
+            num_entries = _I.unpack(f.read(_I.size))[0]
+            rec_fmt = struct.Struct('<q' + 'ii' * table.num_columns)
+            buf = f.read(num_entries * rec_fmt.size)
+        
+        records = list(rec_fmt.iter_unpack(buf))
+        if not records:
+            return
+        
+        table.set_last_rid(max(rec[0] for rec in records))
+        for rec in records:
+            table.page_directory.set(rec[0], zip(rec[1::2], rec[2::2]))
 
     def load_version_chains(self, table_path, table):
         """Load version chains for all records"""
@@ -119,26 +215,61 @@ class Database():
             return
         
         with open(vc_path, 'rb') as f:
-            num_rids = struct.unpack('i', f.read(4))[0]
+            buf = f.read()
+        
+        if _I.unpack_from(buf, 0)[0] != VC_COLUMNAR:
+            self.load_legacy_version_chains(buf, table)
+            return
+        
+        view = memoryview(buf)
+        num_rids = _I.unpack_from(buf, _I.size)[0]
+        offset = 2 * _I.size
+        
+        for i in range(num_rids):
+            rid, num_versions = _RID_HEADER.unpack_from(buf, offset)
+            offset += _RID_HEADER.size
             
-            for i in range(num_rids):
-                rid = struct.unpack('q', f.read(8))[0]
-                num_versions = struct.unpack('i', f.read(4))[0]
-                versions = []
-                
-                for j in range(num_versions):
-                    tail_locations = []
-                    for col in range(table.num_columns):
-                        has_location = struct.unpack('?', f.read(1))[0]
-                        if has_location:
-                            page_idx = struct.unpack('i', f.read(4))[0]
-                            slot_idx = struct.unpack('i', f.read(4))[0]
-                            tail_locations.append((page_idx, slot_idx))
-                        else:
-                            tail_locations.append(None)
-                    versions.append(tail_locations)
-                
-                table.version_chain[rid] = versions
+            chain = VersionChain(table.num_columns)
+            num_bytes = num_versions * table.num_columns * chain.page_idx.itemsize
+            chain.page_idx.frombytes(view[offset:offset + num_bytes])
+            offset += num_bytes
+            chain.slot_idx.frombytes(view[offset:offset + num_bytes])
+            offset += num_bytes
+            if _SWAP_BYTES:
+                chain.page_idx.byteswap()
+                chain.slot_idx.byteswap()
+            
+            table.version_chain[rid] = chain
+
+    def load_legacy_version_chains(self, buf, table):
+        """Decode version chains written with a presence flag before each location"""
+        num_columns = table.num_columns
+        
+        num_rids = _I.unpack_from(buf, 0)[0]
+        offset = _I.size
+        
+        for i in range(num_rids):
+            rid, num_versions = _RID_HEADER.unpack_from(buf, offset)
+            offset += _RID_HEADER.size
+            versions = []
+            
+            for j in range(num_versions):
+                tail_locations = []
+                for col in range(num_columns):
+                    has_location = buf[offset]
+                    offset += 1
+                    if has_location:
+                        tail_locations.append(_II.unpack_from(buf, offset))
+                        offset += _II.size
+                    else:
+                        tail_locations.append(None)
+                versions.append(tail_locations)
+            
+            # Legacy chains are stored newest first
+            chain = VersionChain(num_columns)
+            for tail_locations in reversed(versions):
+                chain.append(tail_locations)
+            table.version_chain[rid] = chain
 
     def close(self):
         """Write all data to disk"""
@@ -148,19 +279,20 @@ class Database():
             
             path = self.path
             
+            # Tables loaded from legacy metadata were never checked; fail before metadata.db is overwritten
+            for table in self.tables:
+                _check_table_name(table.name)
+            
             if not os.path.exists(path):
                 os.makedirs(path)
             
             metadata_path = os.path.join(path, 'metadata.db')
             with open(metadata_path, 'wb') as f:
-                f.write(struct.pack('i', len(self.tables)))
+                f.write(_I.pack(META_FIXED_WIDTH))
+                f.write(_I.pack(len(self.tables)))
                 
                 for table in self.tables:
-                    name_bytes = table.name.encode('utf-8')
-                    f.write(struct.pack('i', len(name_bytes)))
-                    f.write(name_bytes)
-                    f.write(struct.pack('i', table.num_columns))
-                    f.write(struct.pack('i', table.key))
+                    f.write(_TABLE_META.pack(table.name.encode('utf-8'), table.num_columns, table.key))
             
             for table in self.tables:
                 self.save_table_data(path, table)
@@ -172,62 +304,75 @@ class Database():
         if not os.path.exists(table_path):
             os.makedirs(table_path)
         
-        for idx in range(table.num_columns):
-            base_dir = os.path.join(table_path, f'base_col_{idx}')
-            self.save_pages(base_dir, table.base_page[idx])
-        
-        for idx in range(table.num_columns):
-            tail_dir = os.path.join(table_path, f'tail_col_{idx}')
-            self.save_pages(tail_dir, table.tail_page[idx])
+        with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, 2 * table.num_columns)) as executor:
+            futures = []
+            for idx in range(table.num_columns):
+                futures.append(executor.submit(self.save_pages, os.path.join(table_path, f'base_col_{idx}'), table.base_page[idx]))
+                futures.append(executor.submit(self.save_pages, os.path.join(table_path, f'tail_col_{idx}'), table.tail_page[idx]))
+            
+            for future in futures:
+                future.result()
         
-        self.save_page_directory(table_path, table)
-        self.save_version_chains(table_path, table)
+        if table.dirty or not os.path.exists(os.path.join(table_path, 'page_directory.dat')):
+            with table.pd_lock, table.vc_lock:
+                table.dirty = False
+                self.save_page_directory(table_path, table)
+                self.save_version_chains(table_path, table)
 
-    def save_pages(self, directory, pages):
-        """Save all pages to a directory"""
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        
-        for idx, page in enumerate(pages):
-            page_path = os.path.join(directory, f'page_{idx}.dat')
-            with open(page_path, 'wb') as f:
-                f.write(struct.pack('i', page.num_records))
-                f.write(page.data)
+    def save_pages(self, column_path, pages):
+        """
+        Save all pages of a column to a single page file, unless none of them changed since the last load or save.
+        The file is written beside the old one and swapped in, since loaded pages may still be mapped from it.
+        """
+        file_path = column_path + '.dat'
+        tmp_path = file_path + '.tmp'
+        
+        if not any(page.dirty for page in pages) and os.path.exists(file_path):
+            return
+        
+        with open(tmp_path, 'wb') as f:
+            for page in pages:
+                with page.lock:
+                    page.dirty = False
+                    f.write(_I.pack(page.num_records))
+                    f.write(page.data)
+        
+        os.replace(tmp_path, file_path)
 
     def save_page_directory(self, table_path, table):
         """Save the page directory"""
         pd_path = os.path.join(table_path, 'page_directory.dat')
+        rec_fmt = struct.Struct('<q' + 'ii' * table.num_columns)
+        
+        live = list(table.page_directory.items())
+        buf = bytearray(_I.size + len(live) * rec_fmt.size)
+        _I.pack_into(buf, 0, len(live))
+        
+        offset = _I.size
+        for rid, positions in live:
+            rec_fmt.pack_into(buf, offset, rid, *itertools.chain.from_iterable(positions))
+            offset += rec_fmt.size
         
         with open(pd_path, 'wb') as f:
-            f.write(struct.pack('i', len(table.page_directory)))
-            
-            for rid, positions in table.page_directory.items():
-                f.write(struct.pack('q', rid))
-                
-                for page_idx, slot_idx in positions:
-                    f.write(struct.pack('i', page_idx))
-                    f.write(struct.pack('i', slot_idx))
+            f.write(buf)
 
     def save_version_chains(self, table_path, table):
         """Save version chains"""
         vc_path = os.path.join(table_path, 'version_chains.dat')
         
         with open(vc_path, 'wb') as f:
-            f.write(struct.pack('i', len(table.version_chain)))
+            f.write(_I.pack(VC_COLUMNAR))
+            f.write(_I.pack(len(table.version_chain)))
             
-            for rid, versions in table.version_chain.items():
-                f.write(struct.pack('q', rid))
-                f.write(struct.pack('i', len(versions)))
-                
-                for tail_locs in versions:
-                    for col_idx in range(table.num_columns):
-                        if tail_locs[col_idx] is not None:
-                            f.write(struct.pack('?', True))
-                            page_idx, slot_idx = tail_locs[col_idx]
-                            f.write(struct.pack('i', page_idx))
-                            f.write(struct.pack('i', slot_idx))
-                        else:
-                            f.write(struct.pack('?', False))
+            for rid, chain in table.version_chain.items():
+                f.write(_RID_HEADER.pack(rid, len(chain)))
+                page_idx, slot_idx = chain.page_idx, chain.slot_idx
+                if _SWAP_BYTES:
+                    page_idx, slot_idx = array(page_idx.typecode, page_idx), array(slot_idx.typecode, slot_idx)
+                    page_idx.byteswap()
+                    slot_idx.byteswap()
+                f.write(page_idx)
+                f.write(slot_idx)
 
     def create_table(self, name, num_columns, key_index):
         """
@@ -236,9 +381,12 @@ class Database():
         :param num_columns: int
         :param key: int
         """
+        _check_table_name(name)
+        
         with self.db_lock:
             table = Table(name, num_columns, key_index)
             self.tables.append(table)
+            self._publish_tables()
             return table
     
     def drop_table(self, name):
@@ -247,6 +395,7 @@ class Database():
             for table in self.tables:
                 if table.name == name:
                     self.tables.remove(table)
+                    self._publish_tables()
                     print("table dropped")
                     return 1
             print("table not found")
@@ -254,10 +403,9 @@ class Database():
 
     def get_table(self, name):
         """Returns table with the passed name"""
-        with self.db_lock:
-            for table in self.tables:
-                if table.name == name:
-                    print("table was found")
-                    return table
-            print('table not found')
-            return None
\ No newline at end of file
+        table = self._tables_by_name.get(name)
+        if table is not None:
+            print("table was found")
+            return table
+        print('table not found')
+        return None
\ No newline at end of file
@@ -0,0 +1,3 @@
+class FatalAbort(Exception):
+    """A query can never succeed as written (e.g. a column that does not exist); retrying is pointless."""
+    pass
@@ -1,4 +1,5 @@
-import math
+from array import array
+from bisect import bisect_left, bisect_right
 
 class Index:
 
@@ -18,6 +19,22 @@ class Index:
         result = tree.locate(value)
         return result[0] if result else None
 
+    def locate_many(self, column, values):
+        """
+        Returns, for each value, the RID of the first record with that value on column "column", or None.
+        Values are looked up in sorted order so consecutive lookups reuse the tree's leaf hint.
+        """
+        if self.indices[column] is None:
+            return [None] * len(values)
+        
+        tree = self.indices[column]
+        rids = [None] * len(values)
+        for i in sorted(range(len(values)), key=values.__getitem__):
+            result = tree.locate(values[i])
+            if result:
+                rids[i] = result[0]
+        return rids
+
     def locate_range(self, begin, end, column):
         """
         Returns the RIDs of all records with values in column "column" between "begin" and "end".
@@ -31,11 +48,16 @@ class Index:
     def create_index(self, column_number):
         """Create index on specific column"""
         if self.indices[column_number] is None:
-            self.indices[column_number] = BPlusTree(order=4)
+            pairs = []
             for rid, positions in self.table.page_directory.items():
                 page_idx, slot_idx = positions[column_number]
                 value = self.table.read_column(column_number, page_idx, slot_idx)
-                self.indices[column_number].insert(value, rid)
+                pairs.append((value, rid))
+            pairs.sort()
+
+            tree = BPlusTree()
+            tree.bulk_load(pairs)
+            self.indices[column_number] = tree
                 
     def insert(self, column_number, value, rid):
         """Insert a (value, rid) pair into the column's index (if it exists)."""
@@ -43,6 +65,13 @@ class Index:
             tree = self.indices[column_number]
             tree.insert(value, rid)
 
+    def insert_many(self, column_number, values, rids):
+        """Insert (value, rid) pairs into the column's index (if it exists)."""
+        if self.indices[column_number] is not None:
+            tree = self.indices[column_number]
+            for value, rid in sorted(zip(values, rids)):
+                tree.insert(value, rid)
+
     def drop_index(self, column_number):
         """Drop index of specific column"""
         self.indices[column_number] = None
@@ -50,101 +79,150 @@ class Index:
 
 class BPlusTree:
     """B+ Tree implementation for indexing."""
-    def __init__(self, order=4):
+    def __init__(self, order=128):
         self.root = Node(order)
         self.order = order
+        self._leaf_hint = None
+
+    def bulk_load(self, pairs):
+        """
+        Build the tree bottom-up from (key, rid) pairs sorted by key.
+        Leaves are filled sequentially and each internal level is built from the one below it,
+        so no splits or root-to-leaf traversals are needed.
+        """
+        self._leaf_hint = None
+        if not pairs:
+            self.root = Node(self.order)
+            return
+
+        fanout = self.order - 1
+        level = []
+        prev = None
+        for start in range(0, len(pairs), fanout):
+            chunk = pairs[start:start + fanout]
+            leaf = Node(self.order)
+            leaf.keys_arr = array('q', [key for key, rid in chunk])
+            leaf.rids_arr = array('q', [rid for key, rid in chunk])
+            if prev is not None:
+                prev.next = leaf
+            prev = leaf
+            level.append((leaf.keys_arr[0], leaf))
+
+        while len(level) > 1:
+            parents = []
+            for start in range(0, len(level), self.order):
+                group = level[start:start + self.order]
+                parent = Node(self.order)
+                parent.is_leaf = False
+                parent.children = [child for first_key, child in group]
+                parent.keys_arr = array('q', [first_key for first_key, child in group[1:]])
+                parents.append((group[0][0], parent))
+            level = parents
+
+        self.root = level[0][1]
 
     def insert(self, key, rid):
-        """Insert a key-rid pair into the tree."""
-        root = self.root
-        
-        if len(root.keys) == self.order - 1:
+        """
+        Insert a key-rid pair into the tree.
+        Descends iteratively while recording the path, then splits any overflowing nodes on the way back up.
+        """
+        path = []
+        node = self.root
+        while not node.is_leaf:
+            idx = bisect_left(node.keys_arr, key)
+            path.append((node, idx))
+            node = node.children[idx]
+
+        idx = bisect_left(node.keys_arr, key)
+        node.keys_arr.insert(idx, key)
+        node.rids_arr.insert(idx, rid)
+
+        for parent, idx in reversed(path):
+            if len(parent.children[idx].keys_arr) < self.order:
+                return
+            self._split_child(parent, idx)
+
+        if len(self.root.keys_arr) >= self.order:
             new_root = Node(self.order)
             new_root.is_leaf = False
             new_root.children.append(self.root)
             self._split_child(new_root, 0)
             self.root = new_root
 
-        self.insert_non_full(self.root, key, rid)
-
-    def insert_non_full(self, node, key, rid):
-        """Insert into a node that is not full."""
-        if node.is_leaf:
-            idx = 0
-            while idx < len(node.keys) and node.keys[idx][0] < key:
-                idx += 1
-            node.keys.insert(idx, (key, rid))
-        else:
-            i = 0
-            while i < len(node.keys) and key > node.keys[i]:
-                i += 1
-            
-            if len(node.children[i].keys) == self.order - 1:
-                self._split_child(node, i)
-                if key > node.keys[i]:
-                    i += 1
-
-            self.insert_non_full(node.children[i], key, rid)
-        
     def _split_child(self, parent, index):
-        """Split a full child node."""
+        """Split an overflowing child node."""
         node = parent.children[index]
         mid = self.order // 2
         new_node = Node(self.order)
         new_node.is_leaf = node.is_leaf
 
-        split_key = node.keys[mid][0] if node.is_leaf else node.keys[mid]
-        parent.keys.insert(index, split_key)
-        new_node.keys = node.keys[mid:] if node.is_leaf else node.keys[mid + 1:]
-        node.keys = node.keys[:mid]
+        parent.keys_arr.insert(index, node.keys_arr[mid])
 
-        if not node.is_leaf:
-            new_node.children = node.children[mid + 1:]
-            node.children = node.children[:mid + 1]
-        else:
+        if node.is_leaf:
+            new_node.keys_arr = node.keys_arr[mid:]
+            new_node.rids_arr = node.rids_arr[mid:]
+            node.rids_arr = node.rids_arr[:mid]
             new_node.next = node.next
             node.next = new_node
+        else:
+            new_node.keys_arr = node.keys_arr[mid + 1:]
+            new_node.children = node.children[mid + 1:]
+            node.children = node.children[:mid + 1]
+        node.keys_arr = node.keys_arr[:mid]
 
         parent.children.insert(index + 1, new_node)
         
     def locate(self, key):
         """Find all RIDs with the given key."""
+        return self.locate_range(key, key)
+    
+    def _find_leaf(self, key):
+        """
+        Return the leftmost leaf that may hold key.
+        The last leaf found is tried first, so runs of nearby keys skip the descent from the root.
+        The hint is only trusted when key lies strictly past its first entry, since a duplicate of
+        its first key may also sit at the end of the previous leaf. A stale hint only costs a descent.
+        """
+        leaf = self._leaf_hint
+        if leaf is not None:
+            keys = leaf.keys_arr
+            if keys and keys[0] < key <= keys[-1]:
+                return leaf
+
         node = self.root
         while not node.is_leaf:
-            i = 0
-            while i < len(node.keys) and key >= node.keys[i]:
-                i += 1
-            node = node.children[i]
+            node = node.children[bisect_left(node.keys_arr, key)]
+        self._leaf_hint = node
+        return node
 
-        return [rid for k, rid in node.keys if k == key]
-    
     def locate_range(self, start, end):
         """Find all RIDs with keys in the range [start, end]."""
-        node = self.root
-
-        while not node.is_leaf:
-            i = 0
-            while i < len(node.keys) and start > node.keys[i]:
-                i += 1
-            node = node.children[i]
+        node = self._find_leaf(start)
 
         results = []
+        idx = bisect_left(node.keys_arr, start)
 
         while node:
-            for k, rid in node.keys:
-                if start <= k <= end:
-                    results.append(rid)
-                elif k > end:
-                    return results
+            hi = bisect_right(node.keys_arr, end, idx)
+            results.extend(node.rids_arr[idx:hi])
+            if hi < len(node.keys_arr):
+                return results
             node = node.next
+            idx = 0
         return results
 
 
 class Node:
-    """Node in a B+ Tree."""
+    """
+    Node in a B+ Tree.
+    Keys (and, for leaves, their RIDs) are kept in parallel int64 arrays.
+    """
+    __slots__ = ('order', 'keys_arr', 'rids_arr', 'children', 'is_leaf', 'next')
+
     def __init__(self, order):
         self.order = order
-        self.keys = []
+        self.keys_arr = array('q')
+        self.rids_arr = array('q')
         self.children = []
         self.is_leaf = True
-        self.next = None
\ No newline at end of file
+        self.next = None
@@ -1,21 +1,37 @@
 import threading
 from enum import Enum
+from lstore.sharedDS import PageLatch, ReadLatch, WriteLatch
+
+SHARD_BITS = 6
+NUM_SHARDS = 1 << SHARD_BITS
+
+_FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK_64 = (1 << 64) - 1
+
+def _shard(key, bits=SHARD_BITS):
+    """
+    Fibonacci-hash a key into one of 2**bits shards.
+    hash() of a small int is the int itself, so sequential record ids would otherwise
+    land in neighbouring shards in lockstep; the multiply spreads them across the table.
+    """
+    return ((hash(key) * _FIBONACCI_MULTIPLIER) & _MASK_64) >> (64 - bits)
 
 class LockType(Enum):
     SHARED = 1
     EXCLUSIVE = 2
 
+# Shared by every lock with no readers; a real set is only allocated while a record has shared holders
+_NO_HOLDERS = frozenset()
+
 class Lock:
     """Represents a lock on a single record."""
+    __slots__ = ('lock', 'shared_holders', 'exclusive_holder')
+
     def __init__(self):
         self.lock = threading.Lock()
-        self.shared_holders = set()
+        self.shared_holders = _NO_HOLDERS
         self.exclusive_holder = None
     
-    def can_grant_shared(self, transaction_id):
-        """Check if a shared lock can be granted."""
-        return self.exclusive_holder is None or self.exclusive_holder == transaction_id
-    
     def can_grant_exclusive(self, transaction_id):
         """Check if an exclusive lock can be granted."""
         if self.exclusive_holder == transaction_id:
@@ -30,25 +46,42 @@ class Lock:
     
     def acquire_shared(self, transaction_id):
         """Try to acquire a shared lock. Returns True if successful."""
+        # Lock-free fast path for re-acquisition: only transaction_id itself can remove its own
+        # entry, so once it is seen here it stays until this transaction releases or upgrades.
+        if self.exclusive_holder == transaction_id or transaction_id in self.shared_holders:
+            return True
         with self.lock:
-            if self.can_grant_shared(transaction_id):
-                self.shared_holders.add(transaction_id)
+            # Granted unless another transaction holds it exclusively; the holder itself returned above
+            if self.exclusive_holder is None:
+                if self.shared_holders:
+                    self.shared_holders.add(transaction_id)
+                else:
+                    self.shared_holders = {transaction_id}
                 return True
             return False
     
     def acquire_exclusive(self, transaction_id):
         """Try to acquire an exclusive lock. Returns True if successful."""
+        if self.exclusive_holder == transaction_id:
+            return True
         with self.lock:
             if self.can_grant_exclusive(transaction_id):
-                self.shared_holders.discard(transaction_id)
+                self._drop_shared(transaction_id)
                 self.exclusive_holder = transaction_id
                 return True
             return False
     
+    def _drop_shared(self, transaction_id):
+        """Remove a shared holder, returning to the shared empty set once none are left. Caller holds self.lock."""
+        if transaction_id in self.shared_holders:
+            self.shared_holders.discard(transaction_id)
+            if not self.shared_holders:
+                self.shared_holders = _NO_HOLDERS
+    
     def release(self, transaction_id):
         """Release all locks held by this transaction."""
         with self.lock:
-            self.shared_holders.discard(transaction_id)
+            self._drop_shared(transaction_id)
             if self.exclusive_holder == transaction_id:
                 self.exclusive_holder = None
 
@@ -56,18 +89,40 @@ class LockManager:
     """
     Manages locks for all records in the database.
     Implements Strict 2PL with no-wait policy.
+    The lock table is split into shards by record, each guarded by its own reader-writer latch.
+    Per-transaction bookkeeping is split into shards by transaction id, each under its own mutex,
+    so no manager-wide lock is ever taken.
     """
     def __init__(self):
-        self.locks = {}
-        self.manager_lock = threading.Lock()
-        self.transaction_locks = {}
+        self.shards = [{} for _ in range(NUM_SHARDS)]
+        self.shard_latches = [PageLatch() for _ in range(NUM_SHARDS)]
+        # transaction id -> {record id: strongest LockType held}
+        self.transaction_locks = [{} for _ in range(NUM_SHARDS)]
+        self.transaction_latches = [threading.Lock() for _ in range(NUM_SHARDS)]
+    
+    def _shard_index(self, record_id):
+        """Map a record to the shard holding its lock."""
+        return _shard(record_id)
+    
+    def _transaction_shard(self, transaction_id):
+        """Map a transaction to the shard holding its bookkeeping."""
+        return _shard(transaction_id)
+    
+    def _find_lock(self, record_id):
+        """Return the lock for a record, or None if it was never locked."""
+        idx = self._shard_index(record_id)
+        with ReadLatch(self.shard_latches[idx]):
+            return self.shards[idx].get(record_id)
     
     def _get_lock(self, record_id):
         """Get or create a lock for a record."""
-        with self.manager_lock:
-            if record_id not in self.locks:
-                self.locks[record_id] = Lock()
-            return self.locks[record_id]
+        lock = self._find_lock(record_id)
+        if lock is not None:
+            return lock
+        
+        idx = self._shard_index(record_id)
+        with WriteLatch(self.shard_latches[idx]):
+            return self.shards[idx].setdefault(record_id, Lock())
     
     def acquire_shared(self, transaction_id, record_id):
         """
@@ -78,12 +133,10 @@ class LockManager:
         success = lock.acquire_shared(transaction_id)
         
         if success:
-            with self.manager_lock:
-                if transaction_id not in self.transaction_locks:
-                    self.transaction_locks[transaction_id] = []
-                lock_entry = (record_id, LockType.SHARED)
-                if lock_entry not in self.transaction_locks[transaction_id]:
-                    self.transaction_locks[transaction_id].append(lock_entry)
+            idx = self._transaction_shard(transaction_id)
+            with self.transaction_latches[idx]:
+                held = self.transaction_locks[idx].setdefault(transaction_id, {})
+                held.setdefault(record_id, LockType.SHARED)
         
         return success
     
@@ -96,14 +149,10 @@ class LockManager:
         success = lock.acquire_exclusive(transaction_id)
         
         if success:
-            with self.manager_lock:
-                if transaction_id not in self.transaction_locks:
-                    self.transaction_locks[transaction_id] = []
-                self.transaction_locks[transaction_id] = [
-                    (rid, lt) for rid, lt in self.transaction_locks[transaction_id]
-                    if rid != record_id
-                ]
-                self.transaction_locks[transaction_id].append((record_id, LockType.EXCLUSIVE))
+            idx = self._transaction_shard(transaction_id)
+            with self.transaction_latches[idx]:
+                held = self.transaction_locks[idx].setdefault(transaction_id, {})
+                held[record_id] = LockType.EXCLUSIVE
         
         return success
     
@@ -112,24 +161,22 @@ class LockManager:
         Release all locks held by a transaction.
         Called when transaction commits or aborts.
         """
-        with self.manager_lock:
-            if transaction_id not in self.transaction_locks:
-                return
+        idx = self._transaction_shard(transaction_id)
+        with self.transaction_latches[idx]:
+            held = self.transaction_locks[idx].pop(transaction_id, None)
+        
+        if held is None:
+            return
 
-            for record_id, lock_type in self.transaction_locks[transaction_id]:
-                if record_id in self.locks:
-                    self.locks[record_id].release(transaction_id)
-            
-            del self.transaction_locks[transaction_id]
+        for record_id, lock_type in held.items():
+            lock = self._find_lock(record_id)
+            if lock is not None:
+                lock.release(transaction_id)
 
-_lock_manager = None
-_lock_manager_lock = threading.Lock()
+# Created at import time: the import lock already serializes module initialization,
+# so get_lock_manager needs no locking of its own
+_lock_manager = LockManager()
 
 def get_lock_manager():
-    """Get the global lock manager instance (thread-safe singleton)."""
-    global _lock_manager
-    if _lock_manager is None:
-        with _lock_manager_lock:
-            if _lock_manager is None:
-                _lock_manager = LockManager()
-    return _lock_manager
\ No newline at end of file
+    """Get the global lock manager instance."""
+    return _lock_manager
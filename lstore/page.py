@@ -1,29 +1,84 @@
 import threading
+from array import array
+
+PAGE_SIZE = 4096
+CELL_SIZE = 8
+PAGE_CAPACITY = PAGE_SIZE // CELL_SIZE
+
+# New page buffers are carved out of shared slabs of this many pages, so filling up
+# tail pages during updates costs one allocation per slab rather than one per page
+SLAB_PAGES = 64
+
+_slab_lock = threading.Lock()
+_slab = None
+_slab_next = SLAB_PAGES
+
+def _allocate_buffer():
+    """Return a zeroed, writable PAGE_SIZE buffer from the current slab."""
+    global _slab, _slab_next
+    with _slab_lock:
+        if _slab_next == SLAB_PAGES:
+            _slab = memoryview(bytearray(PAGE_SIZE * SLAB_PAGES))
+            _slab_next = 0
+        offset = _slab_next * PAGE_SIZE
+        _slab_next += 1
+        return _slab[offset:offset + PAGE_SIZE]
 
 class Page:
+    __slots__ = ('num_records', '_data', 'cells', 'lock', 'dirty')
 
-    def __init__(self):
+    def __init__(self, data=None):
         self.num_records = 0
-        self.data = bytearray(4096)
-        self.lock = threading.RLock()
+        self.data = data if data is not None else _allocate_buffer()
+        self.lock = threading.Lock()
+        # Set on every write, cleared once the page is on disk
+        self.dirty = True
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, buffer):
+        # Slots are read and written through an int64 view of the buffer, so a cell access is a
+        # single index instead of a slice plus int conversion. Pages are stored little-endian,
+        # which is the native order on every platform this runs on.
+        self._data = buffer
+        self.cells = memoryview(buffer).cast('q')
 
     def has_capacity(self):
-        with self.lock:
-            return self.num_records < 512
+        return self.num_records < PAGE_CAPACITY
 
     def write(self, value):
         with self.lock:
-            if self.has_capacity():
-                offset = self.num_records * 8
-                self.data[offset:offset + 8] = value.to_bytes(8, byteorder='little', signed=True)
-                self.num_records += 1
+            num_records = self.num_records
+            if num_records < PAGE_CAPACITY:
+                self.cells[num_records] = value
+                self.num_records = num_records + 1
+                self.dirty = True
                 return True
             else:
                 return False
             
-    def read(self, slot):
+    def write_bulk(self, values, start=0):
+        """
+        Append values[start:] until the page is full, as one slice copy into the cell view.
+        Returns how many values were written.
+        """
         with self.lock:
-            offset = 8 * slot
-            data_bytes = self.data[offset:offset+8]
-            return int.from_bytes(data_bytes,byteorder='little', signed=True)
+            count = min(PAGE_CAPACITY - self.num_records, len(values) - start)
+            if count > 0:
+                self.cells[self.num_records:self.num_records + count] = array('q', values[start:start + count])
+                self.num_records += count
+                self.dirty = True
+            return max(count, 0)
+            
+    def read(self, slot):
+        # A single-cell load or store is atomic under the GIL, so only appends, which also
+        # bump num_records, need the page lock.
+        return self.cells[slot]
 
+    def overwrite(self, slot, value):
+        """Replace the value in an already written slot."""
+        self.cells[slot] = value
+        self.dirty = True
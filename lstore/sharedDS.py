@@ -1,38 +1,55 @@
 import threading
+from collections import deque
+import os
+
+# Power of two so a shard is picked with a mask
+PAGE_LOCK_SHARDS = 1 << ((os.cpu_count() or 1) * 4 - 1).bit_length()
 
 class ThreadSafeIndex:
     """
     Thread-safe wrapper for Index operations.
-    Protects index operations with locks to prevent race conditions.
+    Lookups share a read latch so they run concurrently; changes to the index take the write latch.
     """
+    __slots__ = ('index', 'latch')
+
     def __init__(self, index):
         self.index = index
-        self.lock = threading.RLock()
+        self.latch = PageLatch()
     
     def create_index(self, column_number):
         """Create an index on a column."""
-        with self.lock:
+        with WriteLatch(self.latch):
             return self.index.create_index(column_number)
     
     def locate(self, column_number, value):
         """Locate records with a specific value in a column."""
-        with self.lock:
+        with ReadLatch(self.latch):
             return self.index.locate(column_number, value)
     
+    def locate_many(self, column_number, values):
+        """Locate the records with each of the given values in a column."""
+        with ReadLatch(self.latch):
+            return self.index.locate_many(column_number, values)
+    
     def locate_range(self, begin, end, column_number):
         """Locate records within a range."""
-        with self.lock:
+        with ReadLatch(self.latch):
             return self.index.locate_range(begin, end, column_number)
     
     def drop_index(self, column_number):
         """Drop an index on a column."""
-        with self.lock:
+        with WriteLatch(self.latch):
             return self.index.drop_index(column_number)
     
     def insert(self, column_number, value, rid):
         """Insert a (value, rid) pair into the column's index."""
-        with self.lock:
+        with WriteLatch(self.latch):
             return self.index.insert(column_number, value, rid)
+    
+    def insert_many(self, column_number, values, rids):
+        """Insert (value, rid) pairs into the column's index."""
+        with WriteLatch(self.latch):
+            return self.index.insert_many(column_number, values, rids)
 
 class ThreadSafeBufferpool:
     """
@@ -41,15 +58,26 @@ class ThreadSafeBufferpool:
     """
     def __init__(self, bufferpool):
         self.bufferpool = bufferpool
-        self.page_locks = {}
+        # Page locks are spread over shards, each with its own mutex, so looking one up
+        # does not serialize every page access on pool_lock
+        self.page_locks = [{} for _ in range(PAGE_LOCK_SHARDS)]
+        self.page_lock_mutexes = [threading.Lock() for _ in range(PAGE_LOCK_SHARDS)]
         self.pool_lock = threading.Lock()
+        self._last_page_lock = threading.local()
     
     def _get_page_lock(self, page_id):
         """Get or create a lock for a specific page."""
-        with self.pool_lock:
-            if page_id not in self.page_locks:
-                self.page_locks[page_id] = threading.RLock()
-            return self.page_locks[page_id]
+        last = getattr(self._last_page_lock, 'entry', None)
+        if last is not None and last[0] == page_id:
+            return last[1]
+        
+        shard = hash(page_id) & (PAGE_LOCK_SHARDS - 1)
+        with self.page_lock_mutexes[shard]:
+            page_lock = self.page_locks[shard].get(page_id)
+            if page_lock is None:
+                page_lock = self.page_locks[shard][page_id] = threading.RLock()
+        self._last_page_lock.entry = (page_id, page_lock)
+        return page_lock
     
     def get_page(self, page_id):
         """Get a page from the buffer pool."""
@@ -108,33 +136,52 @@ class PageLatch:
     """
     Lightweight latch for short-term page protection.
     Use this for buffer pool pages instead of heavy locks.
+    Readers never touch the mutex unless a writer holds or is waiting for the latch: each reader
+    pushes a token onto a deque (append/pop are atomic under the GIL) and re-checks the writer flag.
+    A writer raises the flag first and then waits for the deque to drain, so the two checks
+    cannot both miss each other.
     """
     def __init__(self):
         self.latch = threading.Lock()
-        self.readers = 0
+        self._readers = deque()
         self.writer = False
         self.cv = threading.Condition(self.latch)
     
+    @property
+    def readers(self):
+        """Number of threads currently holding the latch for reading."""
+        return len(self._readers)
+    
     def acquire_read(self):
         """Acquire read latch (multiple readers allowed)."""
+        if not self.writer:
+            self._readers.append(None)
+            if not self.writer:
+                return
+            self._readers.pop()
+            with self.cv:
+                self.cv.notify_all()
+        
         with self.cv:
             while self.writer:
                 self.cv.wait()
-            self.readers += 1
+            self._readers.append(None)
     
     def release_read(self):
         """Release read latch."""
-        with self.cv:
-            self.readers -= 1
-            if self.readers == 0:
+        self._readers.pop()
+        if self.writer:
+            with self.cv:
                 self.cv.notify_all()
     
     def acquire_write(self):
         """Acquire write latch (exclusive)."""
         with self.cv:
-            while self.readers > 0 or self.writer:
+            while self.writer:
                 self.cv.wait()
             self.writer = True
+            while self._readers:
+                self.cv.wait()
     
     def release_write(self):
         """Release write latch."""
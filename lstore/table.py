@@ -1,12 +1,14 @@
 """
 TABLE.PY - FINAL FIX
-Duplicate key checking moved inside insert_lock for full atomicity
+Duplicate key checking is atomic per primary key: it runs under the key's insert stripe
 """
 
 from lstore.index import Index
 from lstore.sharedDS import ThreadSafeIndex
 from time import time
 from lstore.page import Page
+from array import array
+import itertools
 import threading
 
 INDIRECTION_COLUMN = 0
@@ -14,6 +16,9 @@ RID_COLUMN = 1
 TIMESTAMP_COLUMN = 2
 SCHEMA_ENCODING_COLUMN = 3
 
+NO_LOCATION = -1
+INSERT_STRIPES = 64
+
 
 class Record:
 
@@ -22,6 +27,100 @@ class Record:
         self.key = key
         self.columns = columns
 
+class VersionChain:
+    """
+    Tail locations of a record's earlier versions, stored oldest first.
+    Page and slot indexes live in parallel int32 arrays holding one entry per column per version;
+    NO_LOCATION marks a column that the version left unchanged.
+    """
+    def __init__(self, num_columns):
+        self.num_columns = num_columns
+        self.page_idx = array('i')
+        self.slot_idx = array('i')
+
+    def __len__(self):
+        return len(self.page_idx) // self.num_columns
+
+    def append(self, tail_locations):
+        """Add the most recent version, given as a (page, slot) pair or None per column."""
+        for location in tail_locations:
+            if location is None:
+                self.page_idx.append(NO_LOCATION)
+                self.slot_idx.append(NO_LOCATION)
+            else:
+                self.page_idx.append(location[0])
+                self.slot_idx.append(location[1])
+
+    def location(self, version_idx, col_idx):
+        """
+        Returns the (page, slot) of column col_idx in the version_idx-th most recent version (0 = newest),
+        or None if that version did not change the column.
+        """
+        pos = (len(self) - 1 - version_idx) * self.num_columns + col_idx
+        page_idx = self.page_idx[pos]
+        if page_idx == NO_LOCATION:
+            return None
+        return (page_idx, self.slot_idx[pos])
+
+class PageDirectory:
+    """
+    Base page locations of every record, indexed by RID.
+    Page and slot indexes live in parallel int32 arrays holding one entry per column per RID, grown by
+    doubling; NO_LOCATION marks a RID that was never inserted or has been deleted.
+    """
+    def __init__(self, num_columns):
+        self.num_columns = num_columns
+        self.page_idx = array('i')
+        self.slot_idx = array('i')
+
+    def _reserve(self, rid):
+        """Grow the arrays so that rid has an entry."""
+        needed = (rid + 1) * self.num_columns
+        size = len(self.page_idx)
+        if needed > size:
+            filler = array('i', [NO_LOCATION]) * (max(needed, 2 * size) - size)
+            self.page_idx.extend(filler)
+            self.slot_idx.extend(filler)
+
+    def set(self, rid, positions):
+        """Record the (page, slot) of each column of rid."""
+        self._reserve(rid)
+        base = rid * self.num_columns
+        for col, (page_idx, slot_idx) in enumerate(positions):
+            self.page_idx[base + col] = page_idx
+            self.slot_idx[base + col] = slot_idx
+
+    def get(self, rid):
+        """Returns the (page, slot) of each column of rid, or None if it is not a live record."""
+        base = rid * self.num_columns
+        if rid < 0 or base >= len(self.page_idx) or self.page_idx[base] == NO_LOCATION:
+            return None
+        end = base + self.num_columns
+        return list(zip(self.page_idx[base:end], self.slot_idx[base:end]))
+
+    def location(self, rid, col_idx):
+        """Returns the (page, slot) of one column of rid, or None if it is not a live record."""
+        base = rid * self.num_columns
+        if rid < 0 or base >= len(self.page_idx) or self.page_idx[base] == NO_LOCATION:
+            return None
+        return (self.page_idx[base + col_idx], self.slot_idx[base + col_idx])
+
+    def remove(self, rid):
+        """Mark rid as deleted. Returns False if it was not a live record."""
+        base = rid * self.num_columns
+        if rid < 0 or base >= len(self.page_idx) or self.page_idx[base] == NO_LOCATION:
+            return False
+        self.page_idx[base] = NO_LOCATION
+        return True
+
+    def items(self):
+        """Yields (rid, positions) for every live record in RID order."""
+        num_columns = self.num_columns
+        for base in range(0, len(self.page_idx), num_columns):
+            if self.page_idx[base] != NO_LOCATION:
+                end = base + num_columns
+                yield base // num_columns, list(zip(self.page_idx[base:end], self.slot_idx[base:end]))
+
 class Table:
 
     """
@@ -33,76 +132,162 @@ class Table:
         self.name = name
         self.key = key
         self.num_columns = num_columns
-        self.page_directory = {}
+        self.page_directory = PageDirectory(num_columns)
 
         self._index = Index(self)
         self.index = ThreadSafeIndex(self._index)
         
         self.base_page = [[Page()] for _ in range(num_columns)]
         self.tail_page = [[Page()] for _ in range(num_columns)]
-        self.rid_counter = 0
+        self._rid_iter = itertools.count(1)
         self.version_chain = {}
+        # Set whenever page_directory or version_chain changes, cleared once they are on disk
+        self.dirty = True
         
-        self.metadata_lock = threading.RLock()
-        self.pd_lock = threading.RLock()
-        self.rid_lock = threading.RLock()
-        self.vc_lock = threading.RLock()
-        self.insert_lock = threading.RLock()
+        self.pd_lock = threading.Lock()
+        self.vc_lock = threading.Lock()
+        # Inserts of different keys only contend on the per-column locks while appending to base pages
+        self._insert_stripes = [threading.Lock() for _ in range(INSERT_STRIPES)]
+        self._column_locks = [threading.Lock() for _ in range(num_columns)]
 
         self.index.create_index(self.key)
 
     def insert_row(self, columns):
-        """Thread-safe row insertion - entire operation is atomic including duplicate check"""
-        with self.insert_lock:
-            primary_key_value = columns[self.key]
+        """Thread-safe row insertion - atomic per primary key, including the duplicate check"""
+        primary_key_value = columns[self.key]
+        with self._insert_stripes[hash(primary_key_value) & (INSERT_STRIPES - 1)]:
             existing_rid = self.index.locate(self.key, primary_key_value)
             
             if existing_rid is not None:
                 return None
 
-            rid = self.rid_counter + 1
-            self.rid_counter += 1
+            rid = self.allocate_rid()
             
             page_positions = [None] * self.num_columns
 
+            base_page = self.base_page
+            column_locks = self._column_locks
             for i, value in enumerate(columns):
-                current_page = self.base_page[i][-1]
-
-                if not current_page.has_capacity():
-                    new_page = Page()
-                    self.base_page[i].append(new_page)
-                    current_page = new_page
-                
-                current_page.write(value)
-                page_index = len(self.base_page[i]) - 1
-                record_offset = self.base_page[i][-1].num_records - 1
-                page_positions[i] = (page_index, record_offset)
+                with column_locks[i]:
+                    pages = base_page[i]
+                    current_page = pages[-1]
+                    if not current_page.has_capacity():
+                        current_page = Page()
+                        pages.append(current_page)
+                    
+                    current_page.write(value)
+                    page_positions[i] = (len(pages) - 1, current_page.num_records - 1)
 
-            self.page_directory[rid] = page_positions
+            with self.pd_lock:
+                self.page_directory.set(rid, page_positions)
+                self.dirty = True
 
             self.index.insert(self.key, primary_key_value, rid)
             
             return rid
         
+    def allocate_rid(self):
+        """
+        Returns the next RID.
+        next() on an itertools.count runs entirely in C and is atomic under the GIL, so no lock is needed.
+        """
+        return next(self._rid_iter)
+
+    def set_last_rid(self, rid):
+        """Continue RID allocation after rid, e.g. once existing records have been loaded."""
+        self._rid_iter = itertools.count(rid + 1)
+
+    def insert_rows(self, rows):
+        """
+        Insert many rows at once, e.g. for bulk loads.
+        Duplicate checks, page writes and index updates are each done once for the
+        whole batch instead of once per row. Returns the new RID of each row, or None for rows whose
+        primary key already exists (in the table or earlier in the batch).
+        """
+        self._lock_all_stripes()
+        try:
+            keys = [row[self.key] for row in rows]
+            existing = self.index.locate_many(self.key, keys)
+            
+            accepted = []
+            accepted_idx = []
+            seen = set()
+            for j, (row, key, existing_rid) in enumerate(zip(rows, keys, existing)):
+                if existing_rid is None and key not in seen:
+                    seen.add(key)
+                    accepted.append(row)
+                    accepted_idx.append(j)
+            
+            rids = [None] * len(rows)
+            if not accepted:
+                return rids
+            
+            new_rids = [self.allocate_rid() for _ in accepted]
+            positions = [[None] * self.num_columns for _ in accepted]
+            
+            for i in range(self.num_columns):
+                values = [row[i] for row in accepted]
+                with self._column_locks[i]:
+                    pages = self.base_page[i]
+                    page_index = len(pages) - 1
+                    page = pages[page_index]
+                    start = 0
+                    while start < len(values):
+                        if not page.has_capacity():
+                            page = Page()
+                            pages.append(page)
+                            page_index += 1
+                        first_slot = page.num_records
+                        written = page.write_bulk(values, start)
+                        for offset in range(written):
+                            positions[start + offset][i] = (page_index, first_slot + offset)
+                        start += written
+            
+            with self.pd_lock:
+                for rid, row_positions in zip(new_rids, positions):
+                    self.page_directory.set(rid, row_positions)
+                self.dirty = True
+            
+            self.index.insert_many(self.key, [row[self.key] for row in accepted], new_rids)
+            
+            for j, rid in zip(accepted_idx, new_rids):
+                rids[j] = rid
+            return rids
+        finally:
+            self._unlock_all_stripes()
+
+    def _lock_all_stripes(self):
+        """Take every insert stripe, in index order so concurrent callers cannot deadlock."""
+        for stripe in self._insert_stripes:
+            stripe.acquire()
+
+    def _unlock_all_stripes(self):
+        """Release the stripes taken by _lock_all_stripes."""
+        for stripe in reversed(self._insert_stripes):
+            stripe.release()
+
+    def get_locations(self, rid):
+        """Return the base page locations of a record, or None if it does not exist."""
+        return self.page_directory.get(rid)
+
     def read_column(self, col_idx, page_idx, slot_idx):
         """Thread-safe column read"""
         page = self.base_page[col_idx][page_idx]
         return page.read(slot_idx)
     
+    # name, key and num_columns are only assigned in __init__, so the getters need no lock
+
     def get_num_columns(self):
-        """Thread-safe getter for num_columns"""
-        with self.metadata_lock:
-            return self.num_columns
+        """Getter for num_columns"""
+        return self.num_columns
     
     def get_key(self):
-        """Thread-safe getter for key"""
-        with self.metadata_lock:
-            return self.key
+        """Getter for key"""
+        return self.key
     
     def get_name(self):
-        """Thread-safe getter for name"""
-        with self.metadata_lock:
-            return self.name
+        """Getter for name"""
+        return self.name
 
     def merge(self):
         pass
\ No newline at end of file
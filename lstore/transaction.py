@@ -1,17 +1,14 @@
 from lstore.table import Table, Record
 from lstore.index import Index
-import threading
+from lstore.errors import FatalAbort
+import itertools
 
-_transaction_id_lock = threading.Lock()
-_next_transaction_id = 0
+# next() on an itertools.count is atomic under the GIL, so ids need no lock
+_transaction_ids = itertools.count()
 
 def get_next_transaction_id():
     """Generate a unique transaction ID."""
-    global _next_transaction_id
-    with _transaction_id_lock:
-        tid = _next_transaction_id
-        _next_transaction_id += 1
-        return tid
+    return next(_transaction_ids)
 
 class Transaction:
     """
@@ -20,8 +17,10 @@ class Transaction:
     """
     def __init__(self):
         self.transaction_id = get_next_transaction_id()
+        self.fatal = False
         self.queries = []
-        self.executed_operations = [] 
+        # (query, table, args, result) of each query run so far in the current attempt
+        self.executed_operations = []
         
     def add_query(self, query, table, *args):
         """Add a query to this transaction."""
@@ -31,6 +30,7 @@ class Transaction:
         """
         Execute all queries in the transaction.
         Returns True if all succeed, False otherwise.
+        If a query can never succeed, self.fatal is set so the caller does not retry.
         """
         try:
             for query, table, args in self.queries:
@@ -39,15 +39,13 @@ class Transaction:
                 if result is False:
                     return self.abort()
 
-                self.executed_operations.append({
-                    'query': query,
-                    'table': table,
-                    'args': args,
-                    'result': result
-                })
+                self.executed_operations.append((query, table, args, result))
 
             return self.commit()
             
+        except FatalAbort:
+            self.fatal = True
+            return self.abort()
         except Exception as e:
             return self.abort()
     
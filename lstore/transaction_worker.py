@@ -1,17 +1,25 @@
 from lstore.table import Table, Record
 from lstore.index import Index
+from collections import deque
+import random
 import threading
 import time
 
+RETRY_BACKOFF_BASE = 0.0001
+MAX_BACKOFF_MULTIPLIER = 64
+
 class TransactionWorker:
     """
     Transaction worker that executes transactions with limited retry.
     """
-    def __init__(self, transactions = []):
+    def __init__(self, transactions = None):
         self.stats = []
-        self.transactions = transactions[:] if transactions else []
+        # Consumed from the left, so each transaction can be freed as soon as it has run
+        self.transactions = deque(transactions or ())
         self.result = 0
         self.thread = None
+        # Private generator so workers neither share RNG state nor back off in lockstep
+        self.rng = random.Random()
     
     def add_transaction(self, t):
         """Appends t to transactions"""
@@ -30,38 +38,42 @@ class TransactionWorker:
             if self.thread.is_alive():
                 print(f"WARNING: Worker thread did not finish within timeout")
     
+    def _backoff(self, retry_count):
+        """Sleep before a retry: capped exponential backoff, jittered to 50-150% so colliding workers spread out."""
+        delay = min(1 << retry_count, MAX_BACKOFF_MULTIPLIER) * RETRY_BACKOFF_BASE
+        time.sleep(delay * (0.5 + self.rng.random()))
+    
     def __run(self):
         """
         Execute all transactions assigned to this worker.
         With simplified locking, most should succeed on first try.
         """
-        for transaction in self.transactions:
+        while self.transactions:
+            transaction = self.transactions.popleft()
             committed = False
             retry_count = 0
             max_retries = 10
             
+            # Transaction.run turns every query failure into an abort, so it never raises here
             while not committed and retry_count < max_retries:
-                try:
-                    result = transaction.run()
-                    
-                    if result:
-                        committed = True
-                        self.stats.append(True)
-                    else:
-                        transaction.executed_operations.clear()
-                        retry_count += 1
-
-                        if retry_count < max_retries:
-                            time.sleep(0.001)
+                result = transaction.run()
                 
-                except Exception as e:
+                if result:
+                    committed = True
+                    self.stats.append(True)
+                    self.result += 1
+                elif transaction.fatal:
+                    break
+                else:
                     transaction.executed_operations.clear()
                     retry_count += 1
+
                     if retry_count < max_retries:
-                        time.sleep(0.001)
+                        self._backoff(retry_count)
             
             if not committed:
-                print(f"WARNING: Transaction failed after {max_retries} retries")
-                self.stats.append(False)
-        
-        self.result = len([x for x in self.stats if x])
\ No newline at end of file
+                if transaction.fatal:
+                    print(f"WARNING: Transaction aborted with an unretryable error")
+                else:
+                    print(f"WARNING: Transaction failed after {max_retries} retries")
+                self.stats.append(False)
\ No newline at end of file
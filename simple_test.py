@@ -4,123 +4,225 @@ Run this with: python simple_test.py
 
 If it completes in under 5 seconds, deadlock is fixed!
 If it hangs, you still have a deadlock issue.
+
+Run with --sweep to also time inserts over a range of transaction and worker counts.
+Set LOGLEVEL=DEBUG to log each step as it runs.
 """
 
-import signal
+import faulthandler
+import logging
+import os
+import queue
 import sys
+import threading
+import time
+
+from lstore.db import Database
+from lstore.page import PAGE_CAPACITY
+from lstore.query import Query
+from lstore.transaction import Transaction
+from lstore.transaction_worker import TransactionWorker
+
+logger = logging.getLogger(__name__)
+
+# Projection of all five columns, built once instead of as a fresh list per select
+_ALL_COLS = (1,) * 5
+
+def timeout_handler():
+    logger.error("TIMEOUT - DEADLOCK DETECTED: the program is stuck in a deadlock. "
+                 "Check the troubleshooting guide for fixes.")
+    # os._exit skips the final flush, so push out any buffered sweep results first
+    sys.stdout.flush()
+    # Show where every thread is stuck, then exit from this watchdog thread
+    faulthandler.dump_traceback(all_threads=True)
+    os._exit(1)
+
+def _check(ok, message):
+    """Fail the test with message unless ok; unlike assert, this still runs under python -O."""
+    if not ok:
+        raise AssertionError(message)
+
+def _ordered_add(transaction, ops):
+    """Add (query, table, primary_key, ...) ops to transaction in primary key order, so concurrent transactions touch records in one global order."""
+    for op in sorted(ops, key=lambda op: op[2]):
+        transaction.add_query(*op)
+
+# Finished one-shot transactions are reset and reused instead of constructing a new one per query
+_TXN_POOL = queue.SimpleQueue()
+
+def _get_txn():
+    """Take a transaction from the pool, or create one if the pool is empty."""
+    try:
+        return _TXN_POOL.get_nowait()
+    except queue.Empty:
+        return Transaction()
+
+def _put_txn(transaction):
+    """Reset a finished transaction and return it to the pool."""
+    transaction.queries.clear()
+    transaction.executed_operations.clear()
+    transaction.fatal = False
+    _TXN_POOL.put(transaction)
+
+# (transactions per worker, workers) points timed by --sweep, so linear and quadratic slowdowns can be told apart
+_SWEEP = [(1, 1), (10, 2), (100, 4), (1000, 8)]
+
+def _run(db, n, w):
+    """
+    Run n single-insert transactions on each of w workers against a fresh table, each worker on its own key range.
+    Returns the number of committed transactions and the seconds the workers took.
+    """
+    table = db.create_table(f'Sweep_{n}_{w}', 5, 0)
+    # Bound once, so building n * w transactions does not repeat the attribute lookup
+    insert = Query(table).insert
+    workers = []
+    for worker_idx in range(w):
+        worker = TransactionWorker()
+        for key in range(worker_idx * n, (worker_idx + 1) * n):
+            transaction = Transaction()
+            _ordered_add(transaction, [(insert, table, key, 0, 0, 0, 0)])
+            worker.add_transaction(transaction)
+        workers.append(worker)
+    
+    start = time.perf_counter()
+    for worker in workers:
+        worker.run()
+    for worker in workers:
+        worker.join()
+    return sum(worker.result for worker in workers), time.perf_counter() - start
+
+# Steps are logged at DEBUG, so a default run shows only the final verdict or the failure
+logging.basicConfig(format="%(message)s")
+logger.setLevel(os.environ.get("LOGLEVEL", "WARNING"))
+
+# Buffer sweep output instead of flushing on every line; it is flushed at exit or by the watchdog
+sys.stdout.reconfigure(line_buffering=False, write_through=False)
+
+# Set 10 second timeout; a watchdog thread works on every platform, unlike SIGALRM
+faulthandler.enable()
+watchdog = threading.Timer(10, timeout_handler)
+watchdog.daemon = True
+watchdog.start()
+
+logger.debug("1. Creating database...")
+db = Database()
+logger.debug("✓ Database created")
+
+logger.debug("2. Creating table...")
+table = db.create_table('Students', 5, 0)
+logger.debug("✓ Table created")
+
+logger.debug("3. Creating query object...")
+query = Query(table)
+# Looked up once here rather than at every call below
+_KEY = table.key
+_ins, _sel, _upd = query.insert, query.select, query.update
+logger.debug("✓ Query object created")
+
+# Steps 4-11 run on this thread alone; the only other thread is the idle watchdog, which at worst
+# fires up to a second late. Only safe while that holds, so the default is restored before step 12.
+_old_switch_interval = sys.getswitchinterval()
+sys.setswitchinterval(1.0)
+
+logger.debug("4. Testing direct insert (no transaction)...")
+result = _ins(1, 100, 200, 300, 400)
+_check(result is True, "direct insert failed")
+logger.debug("✓ Direct insert succeeded")
+
+logger.debug("5. Testing direct select (no transaction)...")
+result = _sel(1, _KEY, _ALL_COLS)
+_check([record.columns for record in result] == [[1, 100, 200, 300, 400]], f"direct select returned {result}")
+logger.debug("✓ Direct select returned the inserted record")
+
+logger.debug("6. Creating transaction with insert...")
+t1 = _get_txn()
+t1.add_query(_ins, table, 2, 110, 210, 310, 410)
+logger.debug("✓ Transaction created")
+
+logger.debug("7. Running transaction...")
+result = t1.run()
+_check(result is True, "insert transaction aborted")
+_put_txn(t1)
+logger.debug("✓ Transaction committed")
+
+# A lone read needs no transaction around it, so it runs directly like step 5
+logger.debug("8. Testing direct select of the committed insert (no transaction)...")
+result = _sel(2, _KEY, _ALL_COLS)
+_check([record.columns for record in result] == [[2, 110, 210, 310, 410]], f"direct select returned {result}")
+logger.debug("✓ Direct select returned the committed record")
+
+logger.debug("9. Creating transaction with update...")
+t3 = _get_txn()
+t3.add_query(_upd, table, 2, None, 999, None, None, None)
+logger.debug("✓ Transaction created")
+
+logger.debug("10. Running transaction...")
+result = t3.run()
+_check(result is True, "update transaction aborted")
+_put_txn(t3)
+result = _sel(2, _KEY, _ALL_COLS)
+_check(result[0].columns[1] == 999, "update was not applied")
+logger.debug("✓ Transaction committed")
+
+logger.debug("11. Testing batch insert...")
+# Enough rows to spill past the first base page, then a repeat of the batch's first key and a key
+# that step 4 already inserted; both repeats must be rejected
+batch_keys = range(100, 100 + PAGE_CAPACITY + 100)
+rows = [[key, 2 * key, 0, 0, 0] for key in batch_keys]
+rows += [[100, -1, -1, -1, -1], [1, -1, -1, -1, -1]]
+# Where the batch should start: the first free slot of the last base page
+first_page, first_slot = len(table.base_page[0]) - 1, table.base_page[0][-1].num_records
+rids = table.insert_rows(rows)
+_check(len(rids) == len(rows), f"insert_rows returned {len(rids)} RIDs for {len(rows)} rows")
+_check(None not in rids[:len(batch_keys)] and len(set(rids[:len(batch_keys)])) == len(batch_keys),
+       "batch rows did not all get distinct RIDs")
+_check(rids[-2:] == [None, None], f"duplicate keys were not rejected: {rids[-2:]}")
+# Every column of row i lands in the i-th slot after first_slot, rolling over to a fresh page when one fills
+for i, rid in enumerate(rids[:len(batch_keys)]):
+    page_offset, slot = divmod(first_slot + i, PAGE_CAPACITY)
+    expected = [(first_page + page_offset, slot)] * table.num_columns
+    _check(list(table.get_locations(rid)) == expected, f"batch row {i} stored at {table.get_locations(rid)}, expected {expected}")
+for key in (batch_keys[0], batch_keys[PAGE_CAPACITY], batch_keys[-1]):
+    result = _sel(key, _KEY, _ALL_COLS)
+    _check([record.columns for record in result] == [[key, 2 * key, 0, 0, 0]], f"select of batch key {key} returned {result}")
+result = _sel(1, _KEY, _ALL_COLS)
+_check(result[0].columns == [1, 100, 200, 300, 400], "batch overwrote an existing key")
+total = query.sum(batch_keys[0], batch_keys[-1], 1)
+_check(total == 2 * sum(batch_keys), f"sum over the batch returned {total}")
+logger.debug("✓ Batch inserted across a page boundary, duplicates rejected")
+
+sys.setswitchinterval(_old_switch_interval)
+
+logger.debug("12. Testing concurrent transactions...")
+
+# Create two transactions
+t4 = Transaction()
+_ordered_add(t4, [(_ins, table, 3, 120, 220, 320, 420)])
+
+t5 = Transaction()
+_ordered_add(t5, [(_ins, table, 4, 130, 230, 330, 430)])
+
+# One worker per transaction, so the two inserts really run on separate threads at once
+workers = [TransactionWorker([t4]), TransactionWorker([t5])]
+for worker in workers:
+    worker.run()
+for worker in workers:
+    worker.join()
+
+committed = sum(worker.result for worker in workers)
+_check(committed == 2, f"only {committed} of 2 transactions committed")
+logger.debug("✓ Both transactions committed")
+
+if "--sweep" in sys.argv[1:]:
+    logger.debug("13. Sweeping transactions per worker and workers...")
+    for n, w in _SWEEP:
+        committed, seconds = _run(db, n, w)
+        _check(committed == n * w, f"only {committed} of {n * w} transactions committed")
+        print(f"n={n} w={w}: {committed}/{n * w} committed in {seconds:.3f}s")
+
+# Cancel timeout; a failing step raises instead and exits with Python's own traceback,
+# which the daemon watchdog thread does not hold up
+watchdog.cancel()
+
+print("ALL TESTS PASSED - NO DEADLOCK")
 
-def timeout_handler(signum, frame):
-    print("\n" + "="*60)
-    print("❌ TIMEOUT - DEADLOCK DETECTED")
-    print("="*60)
-    print("The program is stuck in a deadlock.")
-    print("Check the troubleshooting guide for fixes.")
-    print("="*60)
-    sys.exit(1)
-
-# Set 10 second timeout
-signal.signal(signal.SIGALRM, timeout_handler)
-signal.alarm(10)
-
-try:
-    print("="*60)
-    print("DEADLOCK TEST")
-    print("="*60)
-    
-    print("\n1. Importing modules...")
-    from lstore.db import Database
-    from lstore.query import Query
-    from lstore.transaction import Transaction
-    print("   ✓ Imports successful")
-    
-    print("\n2. Creating database...")
-    db = Database()
-    print("   ✓ Database created")
-    
-    print("\n3. Creating table...")
-    table = db.create_table('Students', 5, 0)
-    print("   ✓ Table created")
-    
-    print("\n4. Creating query object...")
-    query = Query(table)
-    print("   ✓ Query object created")
-    
-    print("\n5. Testing direct insert (no transaction)...")
-    result = query.insert(1, 100, 200, 300, 400)
-    print(f"   ✓ Direct insert result: {result}")
-    
-    print("\n6. Testing direct select (no transaction)...")
-    result = query.select(1, table.key, [1, 1, 1, 1, 1])
-    print(f"   ✓ Direct select result: {result}")
-    
-    print("\n7. Creating transaction with insert...")
-    t1 = Transaction()
-    t1.add_query(query.insert, table, 2, 110, 210, 310, 410)
-    print("   ✓ Transaction created")
-    
-    print("\n8. Running transaction...")
-    result = t1.run()
-    print(f"   ✓ Transaction result: {result}")
-    
-    print("\n9. Creating transaction with select...")
-    t2 = Transaction()
-    t2.add_query(query.select, table, 2, table.key, [1, 1, 1, 1, 1])
-    print("   ✓ Transaction created")
-    
-    print("\n10. Running transaction...")
-    result = t2.run()
-    print(f"   ✓ Transaction result: {result}")
-    
-    print("\n11. Creating transaction with update...")
-    t3 = Transaction()
-    t3.add_query(query.update, table, 2, None, 999, None, None, None)
-    print("   ✓ Transaction created")
-    
-    print("\n12. Running transaction...")
-    result = t3.run()
-    print(f"   ✓ Transaction result: {result}")
-    
-    print("\n13. Testing concurrent transactions...")
-    from lstore.transaction_worker import TransactionWorker
-    
-    # Create two transactions
-    t4 = Transaction()
-    t4.add_query(query.insert, table, 3, 120, 220, 320, 420)
-    
-    t5 = Transaction()
-    t5.add_query(query.insert, table, 4, 130, 230, 330, 430)
-    
-    # Run in workers
-    worker1 = TransactionWorker([t4])
-    worker2 = TransactionWorker([t5])
-    
-    worker1.run()
-    worker2.run()
-    
-    worker1.join()
-    worker2.join()
-    
-    print(f"   ✓ Worker 1 result: {worker1.result}")
-    print(f"   ✓ Worker 2 result: {worker2.result}")
-    
-    # Cancel timeout
-    signal.alarm(0)
-    
-    print("\n" + "="*60)
-    print("✓✓✓ ALL TESTS PASSED - NO DEADLOCK ✓✓✓")
-    print("="*60)
-    print("\nYour transaction system is working correctly!")
-    print("="*60 + "\n")
-
-except Exception as e:
-    signal.alarm(0)
-    print("\n" + "="*60)
-    print("❌ ERROR OCCURRED")
-    print("="*60)
-    print(f"Error type: {type(e).__name__}")
-    print(f"Error message: {e}")
-    print("\nFull traceback:")
-    import traceback
-    traceback.print_exc()
-    print("="*60 + "\n")
-    sys.exit(1)
\ No newline at end of file